@@ -19,16 +19,35 @@ from __future__ import annotations
 import argparse
 import asyncio
 import json
+import struct
 import time
-from dataclasses import asdict, dataclass
 from datetime import datetime, timezone
-from typing import Any, Dict, Optional, Tuple
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
 
 from bleak import BleakScanner
 
+try:
+    import orjson  # type: ignore
+except ImportError:
+    orjson = None
+
+IBEACON_PREFIX = b"\x02\x15"
+# Precompiled layouts: one C-level unpack instead of several int.from_bytes/slice calls.
+IBEACON_BODY = struct.Struct(">16sHHb")  # uuid, major, minor, tx_power (after the 0x02 0x15 prefix)
+EDDYSTONE_UID = struct.Struct(">b10s6s")  # tx_power, namespace, instance (after the frame byte)
+
+
+@lru_cache(maxsize=4)
+def _utc_second_prefix(sec: int) -> str:
+    return datetime.fromtimestamp(sec, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+
 
 def utc_iso_from_unix_ns(t_unix_ns: int) -> str:
-    return datetime.fromtimestamp(t_unix_ns / 1e9, tz=timezone.utc).isoformat(timespec="microseconds")
+    # Same text as datetime.isoformat(timespec="microseconds"), but the datetime is only
+    # built once per second; bursts of advertisements just append the microsecond tail.
+    sec, ns = divmod(t_unix_ns, 1_000_000_000)
+    return f"{_utc_second_prefix(sec)}.{ns // 1000:06d}+00:00"
 
 
 def normalize_uuid(u: str) -> str:
@@ -41,21 +60,13 @@ def parse_ibeacon(manufacturer_data: Dict[int, bytes]) -> Optional[Dict[str, Any
       0x02 0x15 + 16-byte UUID + major(2) + minor(2) + txPower(1)
     """
     apple = manufacturer_data.get(0x004C)
-    if not apple or len(apple) < 2:
+    if not apple or len(apple) < 2 + IBEACON_BODY.size or apple[:2] != IBEACON_PREFIX:
         return None
-    if apple[0] != 0x02 or apple[1] != 0x15:
-        return None
-    if len(apple) < 2 + 16 + 2 + 2 + 1:
-        return None
-    b = apple[2:]
-    uuid_bytes = b[:16]
-    major = int.from_bytes(b[16:18], "big")
-    minor = int.from_bytes(b[18:20], "big")
-    tx_power = int.from_bytes(b[20:21], "big", signed=True)
-    # Format UUID bytes as 8-4-4-4-12
+    uuid_bytes, major, minor, tx_power = IBEACON_BODY.unpack_from(apple, 2)
+    # Format UUID bytes as 8-4-4-4-12 (bytes.hex() is already lowercase)
     hexs = uuid_bytes.hex()
     uuid = f"{hexs[0:8]}-{hexs[8:12]}-{hexs[12:16]}-{hexs[16:20]}-{hexs[20:32]}"
-    return {"uuid": uuid.lower(), "major": major, "minor": minor, "tx_power": tx_power}
+    return {"uuid": uuid, "major": major, "minor": minor, "tx_power": tx_power}
 
 
 def parse_eddystone(service_data: Dict[str, bytes]) -> Optional[Dict[str, Any]]:
@@ -72,11 +83,9 @@ def parse_eddystone(service_data: Dict[str, bytes]) -> Optional[Dict[str, Any]]:
             if not v or len(v) < 2:
                 return None
             frame = v[0]
-            if frame == 0x00 and len(v) >= 18:
-                tx_power = int.from_bytes(v[1:2], "big", signed=True)
-                namespace = v[2:12].hex()
-                instance = v[12:18].hex()
-                return {"type": "uid", "tx_power": tx_power, "namespace": namespace, "instance": instance}
+            if frame == 0x00 and len(v) >= 1 + EDDYSTONE_UID.size:
+                tx_power, namespace, instance = EDDYSTONE_UID.unpack_from(v, 1)
+                return {"type": "uid", "tx_power": tx_power, "namespace": namespace.hex(), "instance": instance.hex()}
             return {"type": f"0x{frame:02x}"}
     return None
 
@@ -88,17 +97,15 @@ def estimate_distance_m(rssi: int, tx_power: Optional[int], n: float) -> Optiona
     return float(10 ** ((tx_power - rssi) / (10 * n)))
 
 
-@dataclass
-class BeaconRecord:
-    t_unix_ns: int
-    t_utc: str
-    address: str
-    rssi: int
-    local_name: Optional[str] = None
-    tx_power: Optional[int] = None
-    distance_m: Optional[float] = None
-    ibeacon: Optional[Dict[str, Any]] = None
-    eddystone: Optional[Dict[str, Any]] = None
+if orjson is not None:
+
+    def json_line(rec: Dict[str, Any]) -> bytes:
+        return orjson.dumps(rec, option=orjson.OPT_APPEND_NEWLINE)
+
+else:
+
+    def json_line(rec: Dict[str, Any]) -> bytes:
+        return (json.dumps(rec) + "\n").encode("utf-8")
 
 
 async def main() -> int:
@@ -110,14 +117,36 @@ async def main() -> int:
     ap.add_argument("--adapter", default="", help="Bluetooth adapter (optional, e.g. hci0)")
     ap.add_argument("--n", type=float, default=2.0, help="Path-loss exponent for distance estimate (default 2.0)")
     ap.add_argument("--duration", type=float, default=0.0, help="Run for N seconds then stop (0=run forever)")
+    ap.add_argument(
+        "--flush-ms",
+        type=int,
+        default=500,
+        help="Write+flush buffered records at least this often (ms). Bounds data loss / tail latency.",
+    )
     args = ap.parse_args()
 
     out_path = args.out
     mac_filter = args.mac.strip().lower()
     name_filter = args.name.strip().lower()
     uuid_filter = normalize_uuid(args.ibeacon_uuid) if args.ibeacon_uuid else ""
+    # Compare the filter against raw advertisement bytes so rejected packets are never parsed.
+    try:
+        uuid_filter_bytes = bytes.fromhex(uuid_filter.replace("-", ""))
+    except ValueError:
+        ap.error(f"--ibeacon-uuid is not a valid UUID: {args.ibeacon_uuid}")
+
+    # Block-buffered: advertisements arrive many times per second, so rather than a
+    # line-buffered write+flush per record we batch lines and flush every --flush-ms.
+    fh = open(out_path, "ab", buffering=1 << 16)
+    pending: List[bytes] = []
+    batch_max = 256
+
+    def drain() -> None:
+        if pending:
+            fh.write(b"".join(pending))
+            pending.clear()
+        fh.flush()
 
-    fh = open(out_path, "a", buffering=1, encoding="utf-8")
     print(f"Beacon logging to: {out_path}")
     if mac_filter:
         print(f"Filter: mac={mac_filter}")
@@ -130,12 +159,18 @@ async def main() -> int:
         addr = (device.address or "").lower()
         if mac_filter and addr != mac_filter:
             return
-        local_name = (adv_data.local_name or "") if adv_data.local_name else None
+        local_name = adv_data.local_name or None
         if name_filter and (not local_name or name_filter not in local_name.lower()):
             return
 
-        ibeacon = parse_ibeacon(adv_data.manufacturer_data or {})
-        if uuid_filter and (not ibeacon or normalize_uuid(ibeacon["uuid"]) != uuid_filter):
+        mfg = adv_data.manufacturer_data or {}
+        if uuid_filter_bytes:
+            apple = mfg.get(0x004C)
+            if not apple or apple[:2] != IBEACON_PREFIX or apple[2:18] != uuid_filter_bytes:
+                return
+
+        ibeacon = parse_ibeacon(mfg)
+        if uuid_filter and not ibeacon:
             return
 
         eddy = parse_eddystone(adv_data.service_data or {})
@@ -149,32 +184,39 @@ async def main() -> int:
             tx = int(adv_data.tx_power)
 
         t_unix_ns = time.time_ns()
-        rec = BeaconRecord(
-            t_unix_ns=t_unix_ns,
-            t_utc=utc_iso_from_unix_ns(t_unix_ns),
-            address=addr,
-            rssi=int(adv_data.rssi),
-            local_name=local_name,
-            tx_power=tx,
-            distance_m=estimate_distance_m(int(adv_data.rssi), tx, args.n),
-            ibeacon=ibeacon,
-            eddystone=eddy,
-        )
-        fh.write(json.dumps(asdict(rec)) + "\n")
+        rssi = int(adv_data.rssi)
+        # One JSONL record per advertisement (plain dict: no dataclass/asdict copy per packet).
+        rec = {
+            "t_unix_ns": t_unix_ns,
+            "t_utc": utc_iso_from_unix_ns(t_unix_ns),
+            "address": addr,
+            "rssi": rssi,
+            "local_name": local_name,
+            "tx_power": tx,
+            "distance_m": estimate_distance_m(rssi, tx, args.n),
+            "ibeacon": ibeacon,
+            "eddystone": eddy,
+        }
+        pending.append(json_line(rec))
+        if len(pending) >= batch_max:
+            fh.write(b"".join(pending))
+            pending.clear()
 
     scanner = BleakScanner(on_adv, adapter=args.adapter or None)
     await scanner.start()
+    loop = asyncio.get_running_loop()
+    flush_s = max(0.01, args.flush_ms / 1000.0)
     try:
-        if args.duration and args.duration > 0:
-            await asyncio.sleep(args.duration)
-        else:
-            while True:
-                await asyncio.sleep(1)
+        end_t = loop.time() + args.duration if args.duration and args.duration > 0 else None
+        while end_t is None or loop.time() < end_t:
+            wait = flush_s if end_t is None else min(flush_s, max(0.0, end_t - loop.time()))
+            await asyncio.sleep(wait)
+            drain()
     except KeyboardInterrupt:
         pass
     finally:
         await scanner.stop()
-        fh.flush()
+        drain()
         fh.close()
     return 0
 
@@ -14,64 +14,147 @@ from __future__ import annotations
 
 import argparse
 import json
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import orjson  # type: ignore
+except ImportError:
+    orjson = None
+
+# orjson parses the LiDAR lines (long base64 point strings) and encodes the merged records
+# several times faster than the stdlib; both work on bytes, so the files stay binary.
+if orjson is not None:
+    json_loads = orjson.loads
+
+    def json_line(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE)
+
+else:
+    json_loads = json.loads
+
+    def json_line(obj: Any) -> bytes:
+        return (json.dumps(obj) + "\n").encode("utf-8")
 
 
 def read_jsonl(path: Path) -> List[Dict[str, Any]]:
     out: List[Dict[str, Any]] = []
-    with path.open("r", encoding="utf-8") as f:
+    with path.open("rb") as f:
         for line in f:
             line = line.strip()
             if not line:
                 continue
-            out.append(json.loads(line))
+            out.append(json_loads(line))
     return out
 
 
-def nearest_by_time_ns(records: List[Dict[str, Any]], t_ns: int) -> Optional[Dict[str, Any]]:
-    if not records:
+def value_column(records: List[Dict[str, Any]], key: str, cast: Callable[[Any], Any] = float) -> np.ndarray:
+    """cast(records[i][key]) as a float64 array aligned with records, NaN where missing/None."""
+    return np.fromiter(
+        (np.nan if r.get(key) is None else cast(r[key]) for r in records),
+        dtype=np.float64,
+        count=len(records),
+    )
+
+
+@dataclass
+class BeaconColumns:
+    """
+    Beacon log as time-sorted parallel columns (struct-of-arrays), built once on load.
+
+    The per-frame lookups only touch the numeric arrays; the object columns are indexed
+    just for the one record a frame reports.
+    """
+
+    ts: np.ndarray  # int64 t_unix_ns, ascending
+    rssi: np.ndarray  # float64 int(rssi), NaN where missing
+    distance_m: np.ndarray  # float64, NaN where missing
+    # Values as logged (None where missing), for output.
+    rssi_raw: List[Any]
+    distance_m_raw: List[Any]
+    address: List[Any]
+    local_name: List[Any]
+    ibeacon: List[Any]
+
+    @classmethod
+    def from_records(cls, records: List[Dict[str, Any]]) -> "BeaconColumns":
+        ts = np.fromiter((int(r["t_unix_ns"]) for r in records), dtype=np.int64, count=len(records))
+        # Stable, so records with equal timestamps keep their file order.
+        order = np.argsort(ts, kind="stable")
+        records = [records[i] for i in order]
+        return cls(
+            ts=ts[order],
+            rssi=value_column(records, "rssi", int),
+            distance_m=value_column(records, "distance_m"),
+            rssi_raw=[r.get("rssi") for r in records],
+            distance_m_raw=[r.get("distance_m") for r in records],
+            address=[r.get("address") for r in records],
+            local_name=[r.get("local_name") for r in records],
+            ibeacon=[r.get("ibeacon") for r in records],
+        )
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+
+def nearest_by_time_ns(ts: np.ndarray, t_ns: np.ndarray) -> np.ndarray:
+    """
+    For each query time, the index of the nearest record in BeaconColumns.ts.
+
+    Ties (equal distance either side, or duplicate timestamps) go to the earliest record.
+    ts must be non-empty.
+    """
+    i = np.searchsorted(ts, t_ns)  # first record at or after each query
+    after = np.minimum(i, len(ts) - 1)
+    before = np.maximum(i - 1, 0)
+    # The one before wins when there is nothing after, or it is at least as close.
+    take_before = (i == len(ts)) | ((i > 0) & (t_ns - ts[before] <= ts[after] - t_ns))
+    # Step back to the first record sharing the winner's timestamp.
+    return np.where(take_before, np.searchsorted(ts, ts[before]), after)
+
+
+def window_bounds(ts: np.ndarray, t_ns: np.ndarray, window_ns: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    [lo, hi) slices of BeaconColumns.ts holding the records within +-window_ns of each
+    query time (both ends inclusive), for all queries in two vectorized binary searches.
+    """
+    return (
+        np.searchsorted(ts, t_ns - window_ns, side="left"),
+        np.searchsorted(ts, t_ns + window_ns, side="right"),
+    )
+
+
+def _nan_median(xs: np.ndarray) -> Optional[float]:
+    # Sort + index rather than np.median: windows are small, and np.median's generic
+    # dispatch costs several times the sort itself.
+    xs = np.sort(xs[~np.isnan(xs)])
+    n = xs.size
+    if not n:
         return None
-    best = None
-    best_dt = None
-    for r in records:
-        tr = int(r["t_unix_ns"])
-        dt = abs(tr - t_ns)
-        if best_dt is None or dt < best_dt:
-            best_dt = dt
-            best = r
-    return best
-
-
-def window_stats(records: List[Dict[str, Any]], t_ns: int, window_ns: int) -> Optional[Dict[str, Any]]:
-    if not records:
-        return None
-    lo = t_ns - window_ns
-    hi = t_ns + window_ns
-    inwin = [r for r in records if lo <= int(r["t_unix_ns"]) <= hi]
-    if not inwin:
+    mid = n // 2
+    return float(xs[mid]) if n % 2 == 1 else 0.5 * (float(xs[mid - 1]) + float(xs[mid]))
+
+
+def window_stats(beacons: BeaconColumns, lo: int, hi: int) -> Optional[Dict[str, Any]]:
+    """Summarize beacon records [lo, hi), one frame's window from window_bounds()."""
+    if lo >= hi:
         return None
+    last = hi - 1
 
     # Prefer distance_m if present; otherwise RSSI only.
-    rssis = [int(r["rssi"]) for r in inwin if r.get("rssi") is not None]
-    dists = [float(r["distance_m"]) for r in inwin if r.get("distance_m") is not None]
-
     # simple robust-ish summaries (median)
-    def median(xs: List[float]) -> float:
-        xs2 = sorted(xs)
-        n = len(xs2)
-        mid = n // 2
-        return xs2[mid] if (n % 2 == 1) else 0.5 * (xs2[mid - 1] + xs2[mid])
-
     return {
-        "count": len(inwin),
-        "t_first_ns": int(min(int(r["t_unix_ns"]) for r in inwin)),
-        "t_last_ns": int(max(int(r["t_unix_ns"]) for r in inwin)),
-        "rssi_median": median([float(x) for x in rssis]) if rssis else None,
-        "distance_m_median": median(dists) if dists else None,
-        "mac": inwin[-1].get("address"),
-        "name": inwin[-1].get("local_name"),
-        "ibeacon": inwin[-1].get("ibeacon"),
+        "count": hi - lo,
+        "t_first_ns": int(beacons.ts[lo]),
+        "t_last_ns": int(beacons.ts[last]),
+        "rssi_median": _nan_median(beacons.rssi[lo:hi]),
+        "distance_m_median": _nan_median(beacons.distance_m[lo:hi]),
+        "mac": beacons.address[last],
+        "name": beacons.local_name[last],
+        "ibeacon": beacons.ibeacon[last],
     }
 
 
@@ -89,26 +172,34 @@ def main() -> int:
     out_path = Path(args.out).expanduser()
 
     lidar = read_jsonl(lidar_path)
-    beacon = read_jsonl(beacon_path)
+    beacons = BeaconColumns.from_records(read_jsonl(beacon_path))
 
     window_ns = int(args.window_ms) * 1_000_000
 
-    with out_path.open("w", encoding="utf-8") as out:
-        for fr in lidar:
-            t_ns = int(fr["t_unix_ns"])
-
+    # Look up every frame's beacon match up front: one vectorized search over all LiDAR
+    # timestamps instead of a Python-level search per frame.
+    lidar_ts = np.fromiter((int(fr["t_unix_ns"]) for fr in lidar), dtype=np.int64, count=len(lidar))
+    matches: List[Any]
+    if args.nearest_only:
+        matches = nearest_by_time_ns(beacons.ts, lidar_ts).tolist() if len(beacons) else [None] * len(lidar)
+    else:
+        lo, hi = window_bounds(beacons.ts, lidar_ts, window_ns)
+        matches = list(zip(lo.tolist(), hi.tolist()))
+
+    with out_path.open("wb", buffering=1 << 20) as out:
+        for fr, t_ns, match in zip(lidar, lidar_ts.tolist(), matches):
             if args.nearest_only:
-                b = nearest_by_time_ns(beacon, t_ns)
-                b_out = None if b is None else {
-                    "t_unix_ns": int(b["t_unix_ns"]),
-                    "rssi": b.get("rssi"),
-                    "distance_m": b.get("distance_m"),
-                    "address": b.get("address"),
-                    "local_name": b.get("local_name"),
-                    "ibeacon": b.get("ibeacon"),
+                i = match
+                b_out = None if i is None else {
+                    "t_unix_ns": int(beacons.ts[i]),
+                    "rssi": beacons.rssi_raw[i],
+                    "distance_m": beacons.distance_m_raw[i],
+                    "address": beacons.address[i],
+                    "local_name": beacons.local_name[i],
+                    "ibeacon": beacons.ibeacon[i],
                 }
             else:
-                b_out = window_stats(beacon, t_ns, window_ns)
+                b_out = window_stats(beacons, *match)
 
             pts_shape = fr.get("points", {}).get("shape", [0, 0])
             pts_count = int(pts_shape[0]) if isinstance(pts_shape, list) and pts_shape else None
@@ -125,7 +216,7 @@ def main() -> int:
                 "points_count": pts_count,
                 "beacon": b_out,
             }
-            out.write(json.dumps(merged) + "\n")
+            out.write(json_line(merged))
 
     print(f"Wrote merged JSONL: {out_path}")
     return 0
@@ -0,0 +1,43 @@
+import base64
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import build_map_open3d  # noqa: E402
+
+zstandard = pytest.importorskip("zstandard")
+
+
+def _write_zstd_log(path: Path, frames):
+    cctx = zstandard.ZstdCompressor(level=3)
+    with path.open("wb") as f:
+        for i, pts in enumerate(frames, start=1):
+            rec = {
+                "frame_id": i,
+                "scale": 0.001,
+                "points": {
+                    "dtype": "float32",
+                    "shape": list(pts.shape),
+                    "encoding": "base64+zstd",
+                    "data": base64.b64encode(cctx.compress(pts.tobytes())).decode("ascii"),
+                },
+            }
+            f.write(json.dumps(rec).encode() + b"\n")
+
+
+def test_iter_decoded_zstd_with_threads(tmp_path):
+    rng = np.random.default_rng(0)
+    frames = [rng.uniform(-20000, 20000, (int(rng.integers(1000, 20000)), 4)).astype(np.float32) for _ in range(64)]
+    log = tmp_path / "lidar.jsonl"
+    _write_zstd_log(log, frames)
+
+    out = list(build_map_open3d.iter_decoded(log, 1, 4))
+
+    assert [idx for idx, _rec, _pts in out] == list(range(1, len(frames) + 1))
+    for (_idx, _rec, pts), expected in zip(out, frames):
+        np.testing.assert_array_equal(pts, expected)
@@ -0,0 +1,26 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from decode_lidar_log import write_points_csv  # noqa: E402
+
+
+@pytest.mark.parametrize("cols", [3, 4])
+@pytest.mark.parametrize("n", [0, 1, 4096, 4097])
+def test_write_points_csv_matches_savetxt(tmp_path, n, cols):
+    rng = np.random.default_rng(n * 10 + cols)
+    pts = rng.normal(0, 10, (n, cols)).astype(np.float32)
+    if n >= 3:
+        pts[:3, 0] = [0.0, -0.0, 1e-30]  # signed zero and a tiny value
+    header = "x,y,z,intensity" if cols >= 4 else "x,y,z"
+
+    ours = tmp_path / "ours.csv"
+    ref = tmp_path / "ref.csv"
+    write_points_csv(ours, pts)
+    np.savetxt(ref, pts, delimiter=",", header=header, comments="")
+
+    assert ours.read_bytes() == ref.read_bytes()
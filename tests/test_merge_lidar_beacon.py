@@ -0,0 +1,163 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import merge_lidar_beacon  # noqa: E402
+from merge_lidar_beacon import BeaconColumns, nearest_by_time_ns, window_bounds, window_stats  # noqa: E402
+
+WINDOW_NS = 1_000_000_000
+
+
+# Per-frame linear scans, as merge_lidar_beacon did them before the vectorized lookups.
+# They run over the records in time order (the order beacon_logger.py writes them), which
+# is what BeaconColumns sorts into.
+def _scan_nearest(records, t_ns):
+    best = None
+    best_dt = None
+    for r in records:
+        dt = abs(int(r["t_unix_ns"]) - t_ns)
+        if best_dt is None or dt < best_dt:
+            best_dt = dt
+            best = r
+    return best
+
+
+def _scan_window_stats(records, t_ns, window_ns):
+    inwin = [r for r in records if t_ns - window_ns <= int(r["t_unix_ns"]) <= t_ns + window_ns]
+    if not inwin:
+        return None
+    rssis = [float(int(r["rssi"])) for r in inwin if r.get("rssi") is not None]
+    dists = [float(r["distance_m"]) for r in inwin if r.get("distance_m") is not None]
+
+    def median(xs):
+        xs2 = sorted(xs)
+        n = len(xs2)
+        mid = n // 2
+        return xs2[mid] if (n % 2 == 1) else 0.5 * (xs2[mid - 1] + xs2[mid])
+
+    return {
+        "count": len(inwin),
+        "t_first_ns": min(int(r["t_unix_ns"]) for r in inwin),
+        "t_last_ns": max(int(r["t_unix_ns"]) for r in inwin),
+        "rssi_median": median(rssis) if rssis else None,
+        "distance_m_median": median(dists) if dists else None,
+        "mac": inwin[-1].get("address"),
+        "name": inwin[-1].get("local_name"),
+        "ibeacon": inwin[-1].get("ibeacon"),
+    }
+
+
+def _beacon_records():
+    s = 1_000_000_000
+    ts = [10 * s, 12 * s, 12 * s, 14 * s, 20 * s, 20 * s + 1, 30 * s, 40 * s]
+    records = []
+    for i, t in enumerate(ts):
+        records.append(
+            {
+                "t_unix_ns": t,
+                "rssi": None if i == 3 else -40 - i,
+                "distance_m": None if i in (1, 6) else 0.5 * i,
+                "address": f"AA:BB:{i:02d}",
+                "local_name": f"b{i}",
+                "ibeacon": {"major": i},
+            }
+        )
+    return records
+
+
+def _query_times():
+    s = 1_000_000_000
+    return [
+        0,  # before the first beacon
+        10 * s - 1,
+        10 * s,  # exact hit
+        11 * s,  # equidistant between 10 s and a duplicated 12 s
+        12 * s,  # exact hit on duplicate timestamps
+        13 * s,  # equidistant between the 12 s pair and 14 s
+        17 * s,  # equidistant, window reaches nothing
+        20 * s,
+        25 * s,  # empty window between 20 s and 30 s
+        35 * s,  # equidistant between 30 s and 40 s
+        40 * s,
+        41 * s,  # within the window of the last beacon only
+        100 * s,  # after the last beacon, empty window
+    ]
+
+
+@pytest.mark.parametrize("shuffle", [False, True])
+def test_nearest_matches_per_frame_scan(shuffle):
+    records = _beacon_records()
+    logged = list(reversed(records)) if shuffle else records
+    beacons = BeaconColumns.from_records(logged)
+    in_time_order = sorted(logged, key=lambda r: r["t_unix_ns"])
+    queries = _query_times()
+
+    idx = nearest_by_time_ns(beacons.ts, np.array(queries, dtype=np.int64))
+
+    for t_ns, i in zip(queries, idx.tolist()):
+        expected = _scan_nearest(in_time_order, t_ns)
+        assert int(beacons.ts[i]) == expected["t_unix_ns"], t_ns
+        assert beacons.address[i] == expected["address"], t_ns
+        assert beacons.rssi_raw[i] == expected["rssi"], t_ns
+        assert beacons.distance_m_raw[i] == expected["distance_m"], t_ns
+
+
+def test_window_stats_match_per_frame_scan():
+    records = _beacon_records()
+    beacons = BeaconColumns.from_records(records)
+    queries = _query_times()
+
+    lo, hi = window_bounds(beacons.ts, np.array(queries, dtype=np.int64), WINDOW_NS)
+
+    results = [window_stats(beacons, a, b) for a, b in zip(lo.tolist(), hi.tolist())]
+    assert results == [_scan_window_stats(records, t_ns, WINDOW_NS) for t_ns in queries]
+    # The fixture has to exercise both empty and multi-record windows to mean anything.
+    assert any(r is None for r in results)
+    assert any(r is not None and r["count"] > 1 for r in results)
+
+
+def test_random_logs_match_per_frame_scan():
+    rng = np.random.default_rng(0)
+    # Coarse timestamps so duplicates and exact ties are common.
+    beacon_ts = np.sort(rng.integers(0, 200, 300)) * 50_000_000
+    records = [
+        {
+            "t_unix_ns": int(t),
+            "rssi": None if rng.random() < 0.1 else int(rng.integers(-90, -30)),
+            "distance_m": None if rng.random() < 0.3 else float(rng.uniform(0, 10)),
+            "address": f"addr{i}",
+            "local_name": None,
+            "ibeacon": None,
+        }
+        for i, t in enumerate(beacon_ts)
+    ]
+    beacons = BeaconColumns.from_records(records)
+    queries = (rng.integers(-40, 240, 500) * 25_000_000).tolist()
+    t_ns = np.array(queries, dtype=np.int64)
+    window_ns = 100_000_000
+
+    idx = nearest_by_time_ns(beacons.ts, t_ns)
+    lo, hi = window_bounds(beacons.ts, t_ns, window_ns)
+
+    for q, i, a, b in zip(queries, idx.tolist(), lo.tolist(), hi.tolist()):
+        assert beacons.address[i] == _scan_nearest(records, q)["address"], q
+        assert window_stats(beacons, a, b) == _scan_window_stats(records, q, window_ns), q
+
+
+def test_main_without_beacons(tmp_path, monkeypatch):
+    lidar = tmp_path / "lidar.jsonl"
+    beacon = tmp_path / "beacon.jsonl"
+    out = tmp_path / "merged.jsonl"
+    lidar.write_text('{"frame_id": 1, "t_unix_ns": 5}\n{"frame_id": 2, "t_unix_ns": 9}\n')
+    beacon.write_text("")
+
+    for extra in ([], ["--nearest-only"]):
+        argv = ["merge_lidar_beacon.py", "--lidar", str(lidar), "--beacon", str(beacon), "--out", str(out)]
+        monkeypatch.setattr(sys, "argv", argv + extra)
+        assert merge_lidar_beacon.main() == 0
+        merged = [merge_lidar_beacon.json_loads(line) for line in out.read_bytes().splitlines()]
+        assert [m["beacon"] for m in merged] == [None, None]